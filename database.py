@@ -5,8 +5,13 @@ import sqlite3
 PATH_DATABASE = 'gps.db'
 
 
-def connect(path=PATH_DATABASE):
-    return sqlite3.connect(path)
+def connect(path=PATH_DATABASE, check_same_thread=True):
+    connection = sqlite3.connect(path, check_same_thread=check_same_thread)
+    connection.execute('PRAGMA journal_mode=WAL;')
+    connection.execute('PRAGMA synchronous=NORMAL;')
+    connection.execute('PRAGMA temp_store=MEMORY;')
+    connection.execute('PRAGMA cache_size=-20000;')
+    return connection
 
 
 def exists(path=PATH_DATABASE):
@@ -23,7 +28,16 @@ def is_valid(path=PATH_DATABASE):
     return True
 
 
-def create(path=PATH_DATABASE):
+def is_compact(path=PATH_DATABASE):
+    connection = sqlite3.connect(path)
+    cursor = connection.cursor()
+    cursor.execute('PRAGMA table_info(logs);')
+    columns = [row[1] for row in cursor.fetchall()]
+    connection.close()
+    return 'sentence' not in columns
+
+
+def create(path=PATH_DATABASE, compact=False):
     if os.path.exists(path):
         os.remove(path)
 
@@ -33,8 +47,8 @@ def create(path=PATH_DATABASE):
     sql = """
     CREATE TABLE IF NOT EXISTS sessions (
         session_id INTEGER PRIMARY KEY,
-        timestamp_start TEXT,
-        timestamp_end TEXT
+        timestamp_start INTEGER,
+        timestamp_end INTEGER
     );
     """
     cursor.execute(sql)
@@ -43,11 +57,11 @@ def create(path=PATH_DATABASE):
     sql = """
     CREATE TABLE IF NOT EXISTS events (
         session_id INTEGER,
-        timestamp TEXT NOT NULL,
+        timestamp INTEGER NOT NULL,
         event TEXT NOT NULL,
 
         FOREIGN KEY (session_id) 
-            REFERENCES session (session_id) 
+            REFERENCES sessions (session_id) 
                 ON DELETE CASCADE 
                 ON UPDATE NO ACTION
     );
@@ -55,12 +69,12 @@ def create(path=PATH_DATABASE):
     cursor.execute(sql)
     connection.commit()
 
-    sql = """
+    sql = f"""
     CREATE TABLE IF NOT EXISTS logs (
         session_id INTEGER,
-        timestamp TEXT,
+        timestamp INTEGER,
         code TEXT,
-        sentence TEXT,
+        {'' if compact else 'sentence TEXT,'}
         latitude REAL,
         longitude REAL,
         altitude REAL,
@@ -72,7 +86,7 @@ def create(path=PATH_DATABASE):
         height_geoid REAL,
 
         FOREIGN KEY (session_id) 
-            REFERENCES session (session_id) 
+            REFERENCES sessions (session_id) 
                 ON DELETE CASCADE 
                 ON UPDATE NO ACTION
     );
@@ -81,3 +95,21 @@ def create(path=PATH_DATABASE):
     connection.commit()
 
     connection.close()
+
+
+def build_indexes(path=PATH_DATABASE):
+    connection = sqlite3.connect(path)
+    cursor = connection.cursor()
+
+    sql = """
+    CREATE INDEX IF NOT EXISTS idx_logs_session ON logs (session_id);
+    """
+    cursor.execute(sql)
+
+    sql = """
+    CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs (timestamp);
+    """
+    cursor.execute(sql)
+    connection.commit()
+
+    connection.close()
@@ -1 +1 @@
-sudo pip3 install adafruit-circuitpython-gps
+sudo pip3 install pyserial
@@ -1,20 +1,66 @@
+import os
 import sys
 import time
-import datetime
+import select
+import signal
+import calendar
+import queue
+import sqlite3
+import operator
+import itertools
 import threading
 import logging
 import argparse
 
 import serial
-import adafruit_gps
 
+import nmea
 import database
 
 
+FLUSH_MAX_RECORDS = 100
+FLUSH_INTERVAL = 5.0
+
+GPS_FIELDS = operator.attrgetter(
+    'timestamp_utc',
+    'nmea_sentence',
+    'latitude',
+    'longitude',
+    'altitude_m',
+    'speed_knots',
+    'fix_quality',
+    'satellites',
+    'track_angle_deg',
+    'horizontal_dilution',
+    'height_geoid'
+)
+
+SQL_INSERT_LOG = """
+INSERT INTO logs (session_id, timestamp, code, sentence, latitude, longitude, altitude, speed, fix_quality, satellites, track_angle, horizontal_dilution, height_geoid)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+
+SQL_INSERT_LOG_COMPACT = """
+INSERT INTO logs (session_id, timestamp, code, latitude, longitude, altitude, speed, fix_quality, satellites, track_angle, horizontal_dilution, height_geoid)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+
+SQL_INSERT_EVENT = """
+INSERT INTO events (session_id, timestamp, event)
+VALUES (?, ?, ?);
+"""
+
+SQL_UPDATE_SESSION_END = """
+UPDATE sessions
+SET timestamp_end = ?
+WHERE session_id = ?;
+"""
+
+
 def _help():
     print("""\
 usage: main.py [-h] [-v | -q | -s]
-               [--database-file DATABASE_FILE] [--overwrite-file] 
+               [--database-file DATABASE_FILE] [--overwrite-file] [--reindex] [--compact]
                [--max-records MAX_RECORDS] [--max-runtime MAX_RUNTIME]
 
 optional arguments:
@@ -26,6 +72,8 @@ optional arguments:
 database arguments:
   --database-file       specify a database file to either load or create
   --overwrite-file      overwrite database files that potentially exist
+  --reindex             build the database query indexes before exiting
+  --compact             omit raw nmea sentences from new database files and records
 
 other arguments:
   --max-runtime         maximum program runtime in seconds before exiting
@@ -35,49 +83,89 @@ other arguments:
 
 class GPSDataProcessor:
 
+    __slots__ = (
+        '_verbose',
+        '_log_debug',
+        '_database_file',
+        '_overwrite_file',
+        '_reindex',
+        '_compact',
+        '_process_data',
+        '_database_connection',
+        '_database_cursor',
+        '_database_session_id',
+        '_database_queue',
+        '_database_thread',
+        '_pending_records',
+        '_last_flush',
+        '_max_records',
+        '_max_runtime',
+        '_start_time',
+        '_total_processed_records',
+        '_uart',
+        '_terminated',
+        '_logger'
+    )
+
     def __init__(self):
         self._verbose = False
+        self._log_debug = False
 
         self._database_file = None
         self._overwrite_file = False
+        self._reindex = False
+        self._compact = False
+        self._process_data = None
         self._database_connection = None
         self._database_cursor = None
         self._database_session_id = None
 
+        self._database_queue = queue.Queue(maxsize=10000)
+        self._database_thread = None
+        self._pending_records = []
+        self._last_flush = time.monotonic()
+
         self._max_records = None
         self._max_runtime = None
-        self._total_elapsed_runtime = 0
+        self._start_time = None
         self._total_processed_records = 0
 
         self._uart = None
+        self._terminated = False
 
         self._logger = logging.getLogger('rpi-gps')
 
     @staticmethod
     def _format_timestamp(ts):
         if ts:
-            return f'{ts.tm_year}-{ts.tm_mon:02}-{ts.tm_mday:02} {ts.tm_hour:02}:{ts.tm_min:02}:{ts.tm_sec:02}'
+            return calendar.timegm(ts)
         return None
 
     def _exit(self, status):
-        self._process_event('SESSION_END')
+        if self._database_thread is not None and self._database_thread.is_alive():
+            self._process_event('SESSION_END')
+            self._queue_record(None)
+            self._database_thread.join()
+
+        if self._reindex and self._database_thread is not None:
+            self._logger.debug('database: message="building indexes"')
+            database.build_indexes(self._database_file)
+
         log = self._logger.warning if status == 0 else self._logger.fatal
         log('process: message="exited with status %s"', status)
         exit(status)
 
     def _check_processing_complete(self):
-        if self._max_runtime is not None and self._total_elapsed_runtime >= self._max_runtime:
+        if not self._database_thread.is_alive():
+            self._logger.error('database: error="database worker stopped"')
+            self._exit(-1)
+        elif self._max_runtime is not None and time.monotonic() - self._start_time >= self._max_runtime:
             self._logger.warning('process: message="max runtime limit reached at %s"', self._max_runtime)
             self._exit(0)
         elif self._max_records is not None and self._total_processed_records >= self._max_records:
             self._logger.warning('process: message="max records limit reached at %s"', self._max_records)
             self._exit(0)
 
-    def _increment_elapsed_runtime(self, seconds=5):
-        time.sleep(seconds)
-        self._total_elapsed_runtime += seconds
-        self._increment_elapsed_runtime(seconds)
-
     def _initialize_logger(self, args):
         level = logging.DEBUG
 
@@ -98,6 +186,8 @@ class GPSDataProcessor:
         if args.silent:
             self._logger.disabled = True
 
+        self._log_debug = self._logger.isEnabledFor(logging.DEBUG)
+
     def _initialize_settings(self, args):
         self._logger.debug('settings: message="initializing"')
 
@@ -113,9 +203,13 @@ class GPSDataProcessor:
 
         self._database_file = args.database_file
         self._overwrite_file = args.overwrite_file
+        self._reindex = args.reindex
+        self._compact = args.compact
 
         self._logger.debug('database: database_file="%s"', self._database_file)
         self._logger.debug('database: overwrite_file="%s"', self._overwrite_file)
+        self._logger.debug('database: reindex="%s"', self._reindex)
+        self._logger.debug('database: compact="%s"', self._compact)
 
         self._database_file = self._database_file or database.PATH_DATABASE
 
@@ -126,12 +220,15 @@ class GPSDataProcessor:
 
         if self._overwrite_file or not database.exists(self._database_file):
             self._logger.debug('database: message="creating new sqlite3 database file"')
-            database.create(self._database_file)
-            self._database_connection = database.connect(self._database_file)
+            database.create(self._database_file, compact=self._compact)
+            self._database_connection = database.connect(self._database_file, check_same_thread=False)
         elif database.exists(self._database_file):
             self._logger.debug('database: message="opening existing sqlite3 database file"')
             if database.is_valid(self._database_file):
-                self._database_connection = database.connect(self._database_file)
+                if not self._compact and database.is_compact(self._database_file):
+                    self._logger.debug('database: message="existing sqlite3 database file is compact"')
+                    self._compact = True
+                self._database_connection = database.connect(self._database_file, check_same_thread=False)
             else:
                 self._logger.error('database: error="invalid sqlite3 database file at "%s""', self._database_file)
                 self._exit(-1)
@@ -140,31 +237,26 @@ class GPSDataProcessor:
         self._logger.debug('database: message="created sqlite3 database connection successfully"')
 
         sql = """
-        SELECT MAX(rowid) FROM sessions;
+        INSERT INTO sessions (timestamp_start, timestamp_end)
+        VALUES (?, NULL);
         """
-        cursor.execute(sql)
-        last_session_id = cursor.fetchone()[0] or 0
-        session_id = last_session_id + 1
-        self._database_session_id = session_id
-
-        sql = """
-        INSERT INTO sessions (session_id, timestamp_start, timestamp_end)
-        VALUES (?, ?, ?);
-        """
-        parameters = [
-            self._database_session_id,
-            datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            None
-        ]
+        parameters = (
+            int(time.time()),
+        )
         self._database_cursor.execute(sql, parameters)
-        self._database_connection.commit()
+        self._database_session_id = self._database_cursor.lastrowid
 
         self._logger.debug('database: message="created new session id %s"', self._database_session_id)
 
+        self._process_data = self._process_data_compact if self._compact else self._process_data_full
+
+        self._database_thread = threading.Thread(target=self._database_worker, daemon=True)
+        self._database_thread.start()
+
     def _initialize_uart(self, args):
         serial_port = '/dev/ttyUSB0'
         serial_baudrate = 9600
-        serial_timeout = 3000
+        serial_timeout = 0
 
         self._logger.debug('serial: message="initializing"')
         self._logger.debug('serial: port="%s"', serial_port)
@@ -172,11 +264,18 @@ class GPSDataProcessor:
         self._logger.debug('serial: timeout="%s"', serial_timeout)
 
         try:
-            self.uart = serial.Serial(serial_port, baudrate=serial_baudrate, timeout=serial_timeout)
+            self._uart = serial.Serial(serial_port, baudrate=serial_baudrate, timeout=serial_timeout)
         except serial.serialutil.SerialException as err:
             self._logger.error('serial: error="%s"', err.strerror)
             self._exit(-1)
 
+        try:
+            self._uart.set_low_latency_mode(True)
+        except ValueError as err:
+            self._logger.warning('serial: error="%s"', err)
+
+        nmea.set_canonical(self._uart.fileno())
+
     def _initialize(self, args):
         self._initialize_logger(args)
         self._logger.debug('process: message="initializing"')
@@ -184,89 +283,166 @@ class GPSDataProcessor:
         self._initialize_database(args)
         self._initialize_uart(args)
 
-        if self._max_runtime is not None:
-            thread = threading.Thread(target=self._increment_elapsed_runtime, daemon=True)
-            thread.start()
+        self._start_time = time.monotonic()
 
     def _process_event(self, event):
         if event == 'FIX_WAIT':
-            self._logger.debug('process: event="%s"', event)
+            if self._log_debug:
+                self._logger.debug('process: event="%s"', event)
         else:
             self._logger.info('process: event="%s"', event)
 
-        sql = """
-        INSERT INTO events (session_id, timestamp, event)
-        VALUES (?, ?, ?);
-        """
-        parameters = [
+        timestamp = int(time.time())
+        parameters = (
             self._database_session_id,
-            datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            timestamp,
             event
-        ]
-        self._database_cursor.execute(sql, parameters)
-        self._database_connection.commit()
+        )
+        self._queue_record((SQL_INSERT_EVENT, parameters))
 
         if event == 'SESSION_END':
-            sql = """
-            UPDATE sessions
-            SET timestamp_end = ?
-            WHERE session_id = ?;
-            """
-            parameters = [
-                 datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            parameters = (
+                timestamp,
                 self._database_session_id
-            ]
-            self._database_cursor.execute(sql, parameters)
-            self._database_connection.commit()
-
-    def _process_data(self, gps):
-        sql = """
-        INSERT INTO logs (session_id, timestamp, code, sentence, latitude, longitude, altitude, speed, fix_quality, satellites, track_angle, horizontal_dilution, height_geoid)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-        """
-        code = None if not gps.nmea_sentence else gps.nmea_sentence[:gps.nmea_sentence.find(',')]
-        parameters = [
-            self._database_session_id,
-            self._format_timestamp(gps.timestamp_utc),
-            code,
-            gps.nmea_sentence,
-            gps.latitude,
-            gps.longitude,
-            gps.altitude_m,
-            gps.speed_knots,
-            gps.fix_quality,
-            gps.satellites,
-            gps.track_angle_deg,
-            gps.horizontal_dilution,
-            gps.height_geoid
-        ]
-        self._database_cursor.execute(sql, parameters)
+            )
+            self._queue_record((SQL_UPDATE_SESSION_END, parameters))
+
+    def _queue_record(self, record):
+        while self._database_thread.is_alive():
+            try:
+                self._database_queue.put(record, timeout=1.0)
+                return
+            except queue.Full:
+                pass
+
+    def _flush_records(self):
+        if not self._pending_records:
+            return
+
+        for sql, group in itertools.groupby(self._pending_records, key=operator.itemgetter(0)):
+            self._database_cursor.executemany(sql, map(operator.itemgetter(1), group))
         self._database_connection.commit()
 
+        if self._log_debug:
+            self._logger.debug('database: message="flushed %s records"', len(self._pending_records))
+
+        self._pending_records.clear()
+        self._last_flush = time.monotonic()
+
+    def _database_worker(self):
+        running = True
+        while running:
+            timeout = None
+            if self._pending_records:
+                timeout = max(0.0, FLUSH_INTERVAL - (time.monotonic() - self._last_flush))
+
+            try:
+                record = self._database_queue.get(timeout=timeout)
+                while record is not None:
+                    self._pending_records.append(record)
+                    if len(self._pending_records) >= FLUSH_MAX_RECORDS:
+                        break
+                    record = self._database_queue.get_nowait()
+                else:
+                    running = False
+            except queue.Empty:
+                pass
+
+            if not running or len(self._pending_records) >= FLUSH_MAX_RECORDS or time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+                try:
+                    self._flush_records()
+                except sqlite3.Error as err:
+                    self._logger.error('database: error="%s"', err)
+                    return
+
+    def _count_record(self):
         self._total_processed_records += 1
 
-        if self._verbose:
-             self._logger.debug('database: record="%s"', self._total_processed_records)
+        if self._verbose and self._log_debug:
+            self._logger.debug('database: record="%s"', self._total_processed_records)
+
+    def _process_data_full(self, gps):
+        timestamp, sentence, latitude, longitude, altitude, speed, fix_quality, satellites, track_angle, horizontal_dilution, height_geoid = GPS_FIELDS(gps)
+        parameters = (
+            self._database_session_id,
+            self._format_timestamp(timestamp),
+            sentence.partition(',')[0] if sentence else None,
+            sentence,
+            latitude,
+            longitude,
+            altitude,
+            speed,
+            fix_quality,
+            satellites,
+            track_angle,
+            horizontal_dilution,
+            height_geoid
+        )
+        self._queue_record((SQL_INSERT_LOG, parameters))
+        self._count_record()
+
+    def _process_data_compact(self, gps):
+        timestamp, sentence, latitude, longitude, altitude, speed, fix_quality, satellites, track_angle, horizontal_dilution, height_geoid = GPS_FIELDS(gps)
+        parameters = (
+            self._database_session_id,
+            self._format_timestamp(timestamp),
+            sentence.partition(',')[0] if sentence else None,
+            latitude,
+            longitude,
+            altitude,
+            speed,
+            fix_quality,
+            satellites,
+            track_angle,
+            horizontal_dilution,
+            height_geoid
+        )
+        self._queue_record((SQL_INSERT_LOG_COMPACT, parameters))
+        self._count_record()
 
     def _mainloop(self):
         self._logger.debug('process: message="entering main processing loop"')
 
         self._process_event('SESSION_START')
 
-        gps = adafruit_gps.GPS(self._uart)
-        gps.send_command(b'PMTK314,0,1,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0')
-        gps.send_command(b'PMTK220,1000')
-        gps.send_command(b'PMTK605')
+        uart_fd = self._uart.fileno()
+        buffer = bytearray(256)
+
+        for command in (b'PMTK314,0,1,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0', b'PMTK220,1000'):
+            if not nmea.send_command(uart_fd, command):
+                self._logger.warning('serial: error="command %s was not acknowledged"', command.decode())
+        self._uart.write(nmea.format_command(b'PMTK605'))
+
+        gps = nmea.GPS()
+
+        poller = select.poll()
+        poller.register(uart_fd, select.POLLIN)
+
+        buffers = [buffer]
+        view = memoryview(buffer)
+        poll = poller.poll
+        readv = os.readv
+        update = gps.update
+        monotonic_ns = time.monotonic_ns
 
         fix_lost = False
         fix_wait_count = 0
-        time_check = time.monotonic()
+        fresh = False
+        time_check = monotonic_ns()
+        time_current = time_check
 
         while True:
-            gps.update()
-
-            time_current = time.monotonic()
-            if time_current - time_check >= 1.0:
+            timeout = max(0, 1_000_000_000 - (time_current - time_check)) // 1_000_000
+            events = poll(timeout)
+            if events:
+                if events[0][1] & (select.POLLHUP | select.POLLERR):
+                    self._logger.error('serial: error="device disconnected"')
+                    self._exit(-1)
+                size = readv(uart_fd, buffers)
+                fresh = update(view[:size]) or fresh
+
+            time_current = monotonic_ns()
+            if time_current - time_check >= 1_000_000_000:
                 time_check = time_current
 
                 if not gps.has_fix:
@@ -287,15 +463,24 @@ class GPSDataProcessor:
                         fix_lost = False
                         fix_wait_count = 0
 
-                    self._process_data(gps)
+                    if fresh:
+                        self._process_data(gps)
                     self._check_processing_complete()
 
+                fresh = False
+
+    def _terminate(self, signum, frame):
+        self._terminated = True
+        raise KeyboardInterrupt
+
     def start(self, args):
+        signal.signal(signal.SIGTERM, self._terminate)
+
         try:
             self._initialize(args)
             self._mainloop()
         except KeyboardInterrupt:
-            self._exit(-1)
+            self._exit(0 if self._terminated else -1)
 
 
 def main():
@@ -311,6 +496,8 @@ def main():
     group = parser.add_argument_group('database arguments')
     group.add_argument('--database-file', type=str, default=None)
     group.add_argument('--overwrite-file', action='store_true')
+    group.add_argument('--reindex', action='store_true')
+    group.add_argument('--compact', action='store_true')
     group = parser.add_argument_group('other arguments')
     group.add_argument('--max-runtime', type=int, default=None)
     group.add_argument('--max-records', type=int, default=None)
@@ -0,0 +1,217 @@
+import os
+import time
+import select
+import termios
+
+
+_MASK_1024 = (1 << 1024) - 1
+_MASK_512 = (1 << 512) - 1
+_MASK_256 = (1 << 256) - 1
+_MASK_128 = (1 << 128) - 1
+
+
+def checksum(data):
+    value = int.from_bytes(data, 'little')
+    while value >> 1024:
+        value = (value >> 1024) ^ (value & _MASK_1024)
+    value = (value >> 512) ^ (value & _MASK_512)
+    value = (value >> 256) ^ (value & _MASK_256)
+    value = (value >> 128) ^ (value & _MASK_128)
+    value = (value >> 64) ^ (value & 0xffffffffffffffff)
+    value ^= value >> 32
+    value ^= value >> 16
+    value ^= value >> 8
+    return value & 0xff
+
+
+def format_command(command):
+    return b'$%s*%02X\r\n' % (command, checksum(command))
+
+
+def send_command(fd, command, timeout=0.2, attempts=3):
+    number = command[4:].partition(b',')[0]
+    buffer = bytearray(256)
+
+    for _ in range(attempts):
+        os.write(fd, format_command(command))
+        deadline = time.monotonic() + timeout
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                break
+
+            size = os.readv(fd, [buffer])
+            fields = split_sentence(buffer[:size])
+            if fields and len(fields) > 2 and fields[0] == b'PMTK001' and fields[1] == number:
+                if fields[2] == b'3':
+                    return True
+                break
+
+    return False
+
+
+def set_canonical(fd):
+    attributes = termios.tcgetattr(fd)
+    attributes[3] |= termios.ICANON
+    attributes[6][termios.VEOF] = attributes[6][termios.VKILL] = attributes[6][termios.VERASE] = b'\x00'
+    termios.tcsetattr(fd, termios.TCSANOW, attributes)
+
+
+def split_sentence(line):
+    line = line.strip()
+    if not line.startswith(b'$'):
+        return None
+
+    data, _, check = line[1:].partition(b'*')
+    try:
+        if int(check, 16) != checksum(data):
+            return None
+    except ValueError:
+        return None
+
+    return data.split(b',')
+
+
+def _float(value):
+    return float(value) if value else None
+
+
+def _int(value):
+    return int(value) if value else None
+
+
+def _degrees(value, hemisphere):
+    if not value:
+        return None
+    minutes = float(value)
+    degrees = minutes // 100
+    degrees += (minutes - degrees * 100) / 60
+    return -degrees if hemisphere in (b'S', b'W') else degrees
+
+
+def _timestamp(clock, date):
+    if len(clock) < 6 or len(date) < 6:
+        return None
+    hours, seconds = divmod(int(clock[:6]), 10000)
+    minutes, seconds = divmod(seconds, 100)
+    day, year = divmod(int(date[:6]), 10000)
+    month, year = divmod(year, 100)
+    return time.struct_time((
+        2000 + year,
+        month,
+        day,
+        hours,
+        minutes,
+        seconds,
+        0,
+        0,
+        -1
+    ))
+
+
+def parse_rmc(line):
+    fields = split_sentence(line)
+    if fields is None or len(fields) < 10:
+        return None
+    try:
+        return (
+            _timestamp(fields[1], fields[9]),
+            fields[2] == b'A',
+            _degrees(fields[3], fields[4]),
+            _degrees(fields[5], fields[6]),
+            _float(fields[7]),
+            _float(fields[8])
+        )
+    except ValueError:
+        return None
+
+
+def parse_gga(line):
+    fields = split_sentence(line)
+    if fields is None or len(fields) < 12:
+        return None
+    try:
+        return (
+            _int(fields[6]) or 0,
+            _degrees(fields[2], fields[3]),
+            _degrees(fields[4], fields[5]),
+            _int(fields[7]),
+            _float(fields[8]),
+            _float(fields[9]),
+            _float(fields[11])
+        )
+    except ValueError:
+        return None
+
+
+class GPS:
+
+    __slots__ = (
+        'has_fix',
+        'nmea_sentence',
+        'timestamp_utc',
+        'latitude',
+        'longitude',
+        'altitude_m',
+        'speed_knots',
+        'fix_quality',
+        'satellites',
+        'track_angle_deg',
+        'horizontal_dilution',
+        'height_geoid'
+    )
+
+    def __init__(self):
+        self.has_fix = False
+        self.nmea_sentence = None
+        self.timestamp_utc = None
+        self.latitude = None
+        self.longitude = None
+        self.altitude_m = None
+        self.speed_knots = None
+        self.fix_quality = 0
+        self.satellites = None
+        self.track_angle_deg = None
+        self.horizontal_dilution = None
+        self.height_geoid = None
+
+    def _update_rmc(self, line):
+        parsed = parse_rmc(line)
+        if parsed is None:
+            return None
+        timestamp, self.has_fix, latitude, longitude, self.speed_knots, self.track_angle_deg = parsed
+        self.timestamp_utc = timestamp or self.timestamp_utc
+        return latitude, longitude
+
+    def _update_gga(self, line):
+        parsed = parse_gga(line)
+        if parsed is None:
+            return None
+        self.fix_quality, latitude, longitude, self.satellites, self.horizontal_dilution, self.altitude_m, self.height_geoid = parsed
+        self.has_fix = self.fix_quality >= 1
+        return latitude, longitude
+
+    _UPDATES = {
+        b'RMC': _update_rmc,
+        b'GGA': _update_gga
+    }
+
+    def update(self, line):
+        update = self._UPDATES.get(bytes(line[3:6]))
+        if update is None:
+            return False
+
+        line = bytes(line)
+        position = update(self, line)
+        if position is None:
+            return False
+
+        if self.has_fix:
+            self.latitude, self.longitude = position
+
+        self.nmea_sentence = line.strip().decode('ascii', 'replace')
+        return True
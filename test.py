@@ -1,53 +1,97 @@
-import time
+import os
+import sys
+import select
 
 import serial
-import adafruit_gps
+
+import nmea
+
+
+# indexed by (has_fix << 1) | fix_lost, gives the next fix_lost and the event to report
+FIX_TRANSITIONS = (
+    (True, b'FIX_LOST\n'),
+    (True, None),
+    (False, None),
+    (False, b'FIX_FOUND\n')
+)
 
 
 def main():
+    stdout = sys.stdout.fileno()
+    write = os.write
+
+    os.sched_setaffinity(0, {max(os.sched_getaffinity(0))})
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(20))
+    except PermissionError as err:
+        write(stdout, b'%s\n' % str(err.strerror).encode())
+
     uart = None
     serial_port = '/dev/ttyUSB0'
     serial_baudrate = 9600
-    serial_timeout = 3000
+    serial_timeout = 0
 
     try:
         uart = serial.Serial(serial_port, baudrate=serial_baudrate, timeout=serial_timeout)
     except serial.serialutil.SerialException as err:
-        print(err.strerror)
+        write(stdout, b'%s\n' % str(err.strerror).encode())
         exit(-1)
 
-    gps = adafruit_gps.GPS(uart)
-    gps.send_command(b'PMTK314,0,1,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0')
-    gps.send_command(b'PMTK220,1000')
-    gps.send_command(b'PMTK605')
+    try:
+        uart.set_low_latency_mode(True)
+    except ValueError as err:
+        write(stdout, b'%s\n' % str(err).encode())
+
+    nmea.set_canonical(uart.fileno())
+
+    for command in (b'PMTK314,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0', b'PMTK220,1000'):
+        if not nmea.send_command(uart.fileno(), command):
+            write(stdout, b'command %s was not acknowledged\n' % command)
+    uart.write(nmea.format_command(b'PMTK605'))
+
+    gps = nmea.GPS()
+    buffer = bytearray(256)
+
+    poller = select.poll()
+    poller.register(uart, select.POLLIN)
+
+    uart_fd = uart.fileno()
+    buffers = [buffer]
+    view = memoryview(buffer)
+    poll = poller.poll
+    readv = os.readv
+    update = gps.update
 
     fix_lost = False
     fix_wait_count = 0
-    time_check = time.monotonic()
 
     while True:
-        gps.update()
-
-        time_current = time.monotonic()
-        if time_current - time_check >= 1.0:
-            time_check = time_current
-
-            if not gps.has_fix:
-                if not fix_lost:
-                    print('FIX_LOST')
-                    fix_lost = True
-                else:
-                    fix_wait_count += 1
-                    if fix_wait_count > 5:
-                        print('FIX_WAIT')
-                        fix_wait_count = 0
-            else:
-                if fix_lost:
-                    print('FIX_FOUND')
-                    fix_lost = False
-                    fix_wait_count = 0
-
-                print(gps.nmea_sentence)
+        events = poll(1000)
+        if events:
+            if events[0][1] & (select.POLLHUP | select.POLLERR):
+                write(stdout, b'device disconnected\n')
+                exit(-1)
+            size = readv(uart_fd, buffers)
+            line = view[:size]
+            if line[3:6] != b'RMC' or not update(line):
+                continue
+            sentence = bytes(line).rstrip() + b'\n'
+        else:
+            sentence = None
+
+        has_fix = gps.has_fix
+        state = has_fix << 1 | fix_lost
+        fix_lost, event = FIX_TRANSITIONS[state]
+        if event:
+            write(stdout, event)
+
+        fix_wait_count = (fix_wait_count + 1) * (state == 1)
+        if fix_wait_count > 5:
+            write(stdout, b'FIX_WAIT\n')
+            fix_wait_count = 0
+
+        if has_fix and sentence:
+            write(stdout, sentence)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,169 @@
+import time
+import random
+import unittest
+import functools
+import operator
+
+import nmea
+
+try:
+    import test as reader
+except ImportError:
+    reader = None
+
+
+RMC = b'$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,150326,003.1,W*66'
+GGA = b'$GPGGA,123519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,*47'
+
+
+class ChecksumTest(unittest.TestCase):
+
+    def test_matches_bytewise_xor(self):
+        rng = random.Random(0)
+        for size in range(0, 600):
+            data = bytes(rng.randrange(256) for _ in range(size))
+            self.assertEqual(nmea.checksum(data), functools.reduce(operator.xor, data, 0), size)
+
+    def test_matches_bytewise_xor_for_long_input(self):
+        data = bytes(range(256)) * 20 + b'\xff'
+        self.assertEqual(nmea.checksum(data), functools.reduce(operator.xor, data, 0))
+
+    def test_format_command(self):
+        self.assertEqual(nmea.format_command(b'PMTK220,1000'), b'$PMTK220,1000*1F\r\n')
+
+
+class SplitSentenceTest(unittest.TestCase):
+
+    def test_valid(self):
+        self.assertEqual(nmea.split_sentence(GGA + b'\r\n')[:3], [b'GPGGA', b'123519', b'4807.038'])
+
+    def test_lowercase_checksum(self):
+        self.assertEqual(nmea.split_sentence(b'$PMTK220,1000*1f'), [b'PMTK220', b'1000'])
+
+    def test_rejects_missing_start(self):
+        self.assertIsNone(nmea.split_sentence(GGA[1:]))
+
+    def test_rejects_missing_checksum(self):
+        self.assertIsNone(nmea.split_sentence(GGA.partition(b'*')[0]))
+        self.assertIsNone(nmea.split_sentence(GGA.partition(b'*')[0] + b'*'))
+
+    def test_rejects_wrong_checksum(self):
+        self.assertIsNone(nmea.split_sentence(GGA[:-2] + b'48'))
+
+    def test_rejects_non_hex_checksum(self):
+        self.assertIsNone(nmea.split_sentence(GGA[:-2] + b'ZZ'))
+
+    def test_rejects_leading_noise(self):
+        self.assertIsNone(nmea.split_sentence(b'\x04' + GGA))
+
+
+class ParseTest(unittest.TestCase):
+
+    def test_rmc(self):
+        timestamp, active, latitude, longitude, speed, track = nmea.parse_rmc(RMC)
+        self.assertEqual(tuple(timestamp)[:6], (2026, 3, 15, 12, 35, 19))
+        self.assertTrue(active)
+        self.assertAlmostEqual(latitude, 48.1173)
+        self.assertAlmostEqual(longitude, 11.516666666666667)
+        self.assertEqual(speed, 22.4)
+        self.assertEqual(track, 84.4)
+
+    def test_rmc_southern_western_hemisphere(self):
+        line = nmea.format_command(b'GPRMC,123519,A,3351.000,S,15112.000,W,0.0,0.0,150326,,')
+        _, _, latitude, longitude, _, _ = nmea.parse_rmc(line)
+        self.assertAlmostEqual(latitude, -33.85)
+        self.assertAlmostEqual(longitude, -151.2)
+
+    def test_rmc_void(self):
+        line = nmea.format_command(b'GPRMC,123519,V,,,,,,,150326,,')
+        self.assertEqual(nmea.parse_rmc(line)[1:], (False, None, None, None, None))
+
+    def test_gga(self):
+        fix_quality, latitude, longitude, satellites, dilution, altitude, geoid = nmea.parse_gga(GGA)
+        self.assertEqual(fix_quality, 1)
+        self.assertAlmostEqual(latitude, 48.1173)
+        self.assertAlmostEqual(longitude, 11.516666666666667)
+        self.assertEqual((satellites, dilution, altitude, geoid), (8, 0.9, 545.4, 46.9))
+
+    def test_gga_no_fix(self):
+        line = nmea.format_command(b'GPGGA,123519,,,,,0,00,,,M,,M,,')
+        self.assertEqual(nmea.parse_gga(line), (0, None, None, 0, None, None, None))
+
+    def test_rejects_short_sentences(self):
+        self.assertIsNone(nmea.parse_rmc(nmea.format_command(b'GPRMC,123519,A')))
+        self.assertIsNone(nmea.parse_gga(nmea.format_command(b'GPGGA,123519')))
+
+    def test_rejects_malformed_fields(self):
+        self.assertIsNone(nmea.parse_rmc(nmea.format_command(b'GPRMC,12x519,A,4807.038,N,01131.000,E,022.4,084.4,150326,,')))
+        self.assertIsNone(nmea.parse_rmc(nmea.format_command(b'GPRMC,123519,A,48\x0007.038,N,01131.000,E,022.4,084.4,150326,,')))
+        self.assertIsNone(nmea.parse_gga(nmea.format_command(b'GPGGA,123519,4807.038,N,01131.000,E,1,0x,0.9,545.4,M,46.9,M,,')))
+
+
+class GPSTest(unittest.TestCase):
+
+    def test_update_from_buffer_view(self):
+        gps = nmea.GPS()
+        buffer = bytearray(256)
+        buffer[:len(RMC) + 2] = RMC + b'\r\n'
+        self.assertTrue(gps.update(memoryview(buffer)[:len(RMC) + 2]))
+        self.assertTrue(gps.has_fix)
+        self.assertAlmostEqual(gps.latitude, 48.1173)
+        self.assertEqual(gps.timestamp_utc, time.struct_time((2026, 3, 15, 12, 35, 19, 0, 0, -1)))
+        self.assertEqual(gps.nmea_sentence, RMC.decode())
+
+    def test_update_gga(self):
+        gps = nmea.GPS()
+        self.assertTrue(gps.update(GGA))
+        self.assertEqual((gps.fix_quality, gps.satellites, gps.altitude_m), (1, 8, 545.4))
+
+    def test_update_keeps_position_without_fix(self):
+        gps = nmea.GPS()
+        gps.update(RMC)
+        self.assertTrue(gps.update(nmea.format_command(b'GPRMC,123520,V,,,,,,,150326,,')))
+        self.assertFalse(gps.has_fix)
+        self.assertAlmostEqual(gps.latitude, 48.1173)
+
+    def test_update_ignores_other_sentences(self):
+        gps = nmea.GPS()
+        self.assertFalse(gps.update(nmea.format_command(b'PMTK001,220,3')))
+        self.assertFalse(gps.update(nmea.format_command(b'GPGSV,1,1,00')))
+        self.assertFalse(gps.update(GGA[:-2] + b'00'))
+        self.assertIsNone(gps.nmea_sentence)
+
+
+@unittest.skipIf(reader is None, 'pyserial is not installed')
+class FixTransitionsTest(unittest.TestCase):
+
+    @staticmethod
+    def _ladder(has_fix, fix_lost):
+        if not has_fix:
+            if not fix_lost:
+                return True, b'FIX_LOST\n'
+            return True, None
+        if fix_lost:
+            return False, b'FIX_FOUND\n'
+        return False, None
+
+    def test_matches_ladder(self):
+        for has_fix in (False, True):
+            for fix_lost in (False, True):
+                self.assertEqual(reader.FIX_TRANSITIONS[has_fix << 1 | fix_lost], self._ladder(has_fix, fix_lost))
+
+    def test_fix_wait_sequence(self):
+        fix_lost = False
+        fix_wait_count = 0
+        events = []
+        for has_fix in [False] * 13 + [True] * 2 + [False]:
+            state = has_fix << 1 | fix_lost
+            fix_lost, event = reader.FIX_TRANSITIONS[state]
+            if event:
+                events.append(event)
+            fix_wait_count = (fix_wait_count + 1) * (state == 1)
+            if fix_wait_count > 5:
+                events.append(b'FIX_WAIT\n')
+                fix_wait_count = 0
+        self.assertEqual(events, [b'FIX_LOST\n', b'FIX_WAIT\n', b'FIX_WAIT\n', b'FIX_FOUND\n', b'FIX_LOST\n'])
+
+
+if __name__ == '__main__':
+    unittest.main()